@@ -1,28 +1,39 @@
 import sys
 import argparse
 import importlib
+
+# Known entry points: short name -> (module path, function name)
+ENTRIES = {
+    "player": ("src.player", "main"),
+    "shrimp_point": ("src.interesting_practice.get_shrimp_point", "main"),
+}
+
 def main():
     parser = argparse.ArgumentParser(description="Dynamically run a function from a specified module.")
     parser.add_argument('--module', type=str, required=True,
-                        help='The module path (e.g., src.player)')
-    parser.add_argument('--entry', type=str, default='main',
-                        help='The function name to execute (default: main)')
+                        help=f'The module path (e.g., src.player), or one of the known entries: {", ".join(ENTRIES)}')
+    parser.add_argument('--entry', type=str, default=None,
+                        help='The function name to execute (default: main, or the function of the known entry)')
     args = parser.parse_args()
 
+    module_path, entry = ENTRIES.get(args.module, (args.module, 'main'))
+    if args.entry is not None:
+        entry = args.entry
+
     try:
-        module = importlib.import_module(args.module)
+        module = importlib.import_module(module_path)
     except ModuleNotFoundError as e:
-        print(f"Error: Module '{args.module}' not found.", file=sys.stderr)
+        print(f"Error: Module '{module_path}' not found.", file=sys.stderr)
         print(f"This is the error message: {e}")
         sys.exit(1)
 
-    if not hasattr(module, args.entry):
-        print(f"Error: Function '{args.entry}' not found in module '{args.module}'.", file=sys.stderr)
+    if not hasattr(module, entry):
+        print(f"Error: Function '{entry}' not found in module '{module_path}'.", file=sys.stderr)
         sys.exit(1)
 
-    func = getattr(module, args.entry)
+    func = getattr(module, entry)
     if not callable(func):
-        print(f"Error: '{args.entry}' is not a callable function in module '{args.module}'.", file=sys.stderr)
+        print(f"Error: '{entry}' is not a callable function in module '{module_path}'.", file=sys.stderr)
         sys.exit(1)
 
     func()
@@ -1,51 +1,66 @@
-from typing import Set, Literal
-from attr import dataclass
+from typing import AbstractSet, Literal
+from attrs import define, field
 from datetime import datetime, timedelta
+import copy
+from functools import lru_cache
+from urllib.parse import urlencode
 import yaml
+try:
+    from yaml import CSafeLoader as _Loader # libyaml-backed, much faster than the pure Python loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
 
 CONFIG_FILE = "config/config.yaml"
 SELECTOR_FILE = "config/HLTV_website_selector_path.yaml"
 
-@dataclass
+@define
 class ScraperConfig:
     chrome_driver_path:str
-    page_load_strategy:str
     headless: bool
+    page_load_strategy:str = 'eager' # Do not wait for ads and trackers, the scraper waits for the elements it needs instead
+    use_http: bool = False # Fetch pages not protected by Cloudflare (search, match list) with httpx instead of Selenium
+    http_batch_size: int = 4 # Match history pages requested concurrently with `use_http`, keep it small to respect HLTV rate limits
+    cache_dir: str | None = None # Cache scraped results on disk with diskcache, None to disable
+    cache_ttl: float | None = 86400 # Seconds before cached stats and match lists expire, None for never. Search results never expire
     
     BASE_URL:str = 'https://www.hltv.org'
-    LOG_FILE:str = 'logs/' + datetime.now().strftime("%Y-%m-%d")
+    LOG_FILE:str = field(factory=lambda: 'logs/' + datetime.now().strftime("%Y-%m-%d"))
 
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
-
-@dataclass
+@define
 class WebsiteSelectorPaths:
+    search_box: str
     search: str
-    player_basic_stats: dict[str, str]
+    player_stat_box: str
+    player_basic_stats: dict[str, str] # relative to player_stat_box
     match_table: str
 
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
-
 
-@dataclass
+@define
 class PlayerConfig:
     pass
 
-@dataclass
+@define
 class MatchConfig:
     pass
 
+# quick_time_filter -> how far the range goes back from now, None for no lower bound
+_QTF_DELTAS: dict[str, timedelta | None] = {
+    "All": None,
+    "Last Month": timedelta(days=30),
+    "Last 3 Months": timedelta(days=90),
+    "Last 6 Months": timedelta(days=180),
+    "Last 12 Months": timedelta(days=365),
+}
+
 class Filter:
+    __slots__ = ("quick_time_filter", "start_date", "end_date", "match_type", "cs_version", "maps", "ranking")
     map_names = Literal["All", "de_ancient", "de_dust2", "de_inferno", "de_mirage", "de_nuke", "de_overpass", "de_train", "de_anubis", "de_vertigo", "de_cache", "de_cobblestone"]
     quick_time_filter:Literal["All", "Last Month", "Last 3 Months", "Last 6 Months", "Last 12 Months"] | None
     start_date:datetime
     end_date:datetime
     match_type:str # Majors, BigEvents, Lan, Online
     cs_version:str # CSGO, CS2
-    maps:Set[map_names] # de_[map_name]
+    maps:frozenset[map_names] # de_[map_name]
     ranking:str    # Top5, Top10, Top20, Top30, Top50
 
     def __init__(self, 
@@ -54,7 +69,7 @@ class Filter:
                  end_date:datetime = datetime.max, 
                  match_type:Literal["All", "Majors", "BigEvents", "Lan", "Online"] = "All", 
                  cs_version:Literal["All", "CSGO", "CS2"] = "All", 
-                 maps:Set[map_names] = {"All"},
+                 maps:AbstractSet[map_names] = frozenset({"All"}),
                  ranking:Literal["All", "Top5", "Top10", "Top20", "Top30", "Top50"] = "All"):
         """
         Filter for match search, player stat search, etc.
@@ -69,7 +84,7 @@ class Filter:
         - end_date : datetime
         - match_type : str
         - cs_version : str
-        - maps : Set[str]
+        - maps : AbstractSet[str], stored as a frozenset
         - ranking : str
 
         Returns
@@ -78,30 +93,17 @@ class Filter:
         """
         self.quick_time_filter = quick_time_filter
         if quick_time_filter is not None:
-            match quick_time_filter:
-                case "All":
-                    self.start_date = datetime.min
-                    self.end_date = datetime.now()
-                case "Last Month":
-                    self.start_date = datetime.now() - timedelta(days=30)
-                    self.end_date = datetime.now()
-                case "Last 3 Months":
-                    self.start_date = datetime.now() - timedelta(days=90)
-                    self.end_date = datetime.now()
-                case "Last 6 Months":
-                    self.start_date = datetime.now() - timedelta(days=180)
-                    self.end_date = datetime.now()
-                case "Last 12 Months":
-                    self.start_date = datetime.now() - timedelta(days=365)
-                    self.end_date = datetime.now()
-                case _:
-                    raise ValueError("quick_time_filter is not valid")
+            if quick_time_filter not in _QTF_DELTAS:
+                raise ValueError("quick_time_filter is not valid")
+            now = datetime.now()
+            delta = _QTF_DELTAS[quick_time_filter]
+            self.start_date, self.end_date = (datetime.min if delta is None else now - delta), now
         else:
             self.start_date = start_date
             self.end_date = end_date
         self.match_type = match_type
         self.cs_version = cs_version
-        self.maps = maps
+        self.maps = frozenset(maps)
         self.ranking = ranking
 
 
@@ -115,28 +117,29 @@ class Filter:
         if self.cs_version != 'All':
             query["csVersion"] = self.cs_version
         if "All" not in self.maps:
-            query["maps"] = "&".join([ n_map for n_map in self.maps ])
+            query["maps"] = sorted(self.maps) # HLTV takes one `maps=` parameter per map
         if self.ranking != 'All':
             query["rankingFilter"] = self.ranking
-        query_string = "&".join([f"{key}={value}" for key, value in query.items()])
-        return query_string
+        return urlencode(query, doseq=True)
 
-def get_scraper_config(config_file = CONFIG_FILE) -> ScraperConfig:
+@lru_cache(maxsize=None)
+def _load_yaml(config_file:str) -> dict:
+    # Config files are read and parsed only once per process. Do not hand this dict out, it is shared by every caller.
     with open(config_file, 'r') as file:
-        config = yaml.safe_load(file)
-        return ScraperConfig(**config['scraper'])
+        return yaml.load(file, Loader=_Loader)
+
+def _get_config(config_file:str) -> dict:
+    # A copy of the cached config, so that callers mutating it (e.g. player_basic_stats) cannot affect each other.
+    return copy.deepcopy(_load_yaml(config_file))
+
+def get_scraper_config(config_file = CONFIG_FILE) -> ScraperConfig:
+    return ScraperConfig(**_get_config(config_file)['scraper'])
     
 def get_player_config(config_file = CONFIG_FILE) -> PlayerConfig:
-    with open(config_file, 'r') as file:
-        config = yaml.safe_load(file)
-        return PlayerConfig(**config['player'])
+    return PlayerConfig(**_get_config(config_file)['player'])
     
 def get_match_config(config_file = CONFIG_FILE) -> MatchConfig:
-    with open(config_file, 'r') as file:
-        config = yaml.safe_load(file)
-        return MatchConfig(**config['match'])
+    return MatchConfig(**_get_config(config_file)['match'])
     
 def get_selector_paths(config_file = SELECTOR_FILE) -> WebsiteSelectorPaths:
-    with open(config_file, 'r') as file:
-        config = yaml.safe_load(file)
-        return WebsiteSelectorPaths(**config)
\ No newline at end of file
+    return WebsiteSelectorPaths(**_get_config(config_file))
\ No newline at end of file
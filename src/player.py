@@ -7,15 +7,35 @@
         - get formatted data
 """
 
+import asyncio
+from typing import TYPE_CHECKING
+from urllib.parse import urljoin
+
 import selenium.common.exceptions
 from selenium.webdriver.common.by import By
-import undetected_chromedriver as uc
-from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
 
 from src.configs import get_scraper_config, get_selector_paths, Filter # This is in ./src! Not ./config !
 from src.logger import get_logger
 from src.views.visualize import visualize_player_stats
 from src.utils.exponential_backoff import exponential_backoff
+from src.utils.disk_cache import disk_cache
+
+if TYPE_CHECKING:
+    import undetected_chromedriver as uc
+
+def _is_permanent_error(e:BaseException) -> bool:
+    """
+    Whether retrying cannot fix the error: a bug in the scraper, or an HTTP 4xx other than a Cloudflare challenge / rate limit.
+    """
+    if isinstance(e, (KeyError, AttributeError, TypeError)):
+        return True
+    status_code = getattr(getattr(e, 'response', None), 'status_code', None)
+    return status_code is not None and 400 <= status_code < 500 and status_code not in (403, 429)
+
+# Idle drivers keyed on (headless, page_load_strategy), so that a new scraper can reuse a warm browser.
+_DRIVER_POOL: dict[tuple, list["uc.Chrome"]] = {}
 
 class HLTV_Player_Stat_Scraper:
     """
@@ -25,6 +45,28 @@ class HLTV_Player_Stat_Scraper:
     and get lists of their match URLs. It uses Selenium with undetected Chrome driver
     to scrape data from the HLTV website.
     """
+    # Receives the stat box selector and {stat_key: css_selector relative to the stat box},
+    # returns {stat_key: first line of the element text, or null if not found}, or null if the stat box is not found.
+    _BASIC_STATS_SCRIPT = """
+        const container = document.querySelector(arguments[0]);
+        if (container === null) {
+            return null;
+        }
+        const selectors = arguments[1];
+        const stats = {};
+        for (const key in selectors) {
+            const element = container.querySelector(selectors[key]);
+            stats[key] = element ? element.innerText.split('\\n')[0] : null;
+        }
+        return stats;
+    """
+    # Receives a css selector of links, returns their absolute URLs.
+    _MATCH_URLS_SCRIPT = "return Array.from(document.querySelectorAll(arguments[0]), a => a.href);"
+    _PAGE_WAIT_TIMEOUT = 10 # seconds to wait for the element of interest after `driver.get`
+    _HTTP_HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    }
+
     def __init__(self, player_name:str|None = None, player_id:int|None = None):
         """
         Initialize the HLTV player stat scraper.
@@ -45,7 +87,12 @@ class HLTV_Player_Stat_Scraper:
         logger : Logger
             Logger instance for logging events
         _driver : WebDriver
-            Selenium WebDriver instance
+            Selenium WebDriver instance, taken from the driver pool if one is available.
+            Call `close()` (or use the scraper as a context manager) to hand it back.
+        _http : httpx.Client or None
+            HTTP client for pages not protected by Cloudflare, only created when `use_http` is enabled in config.
+        _cache : diskcache.Cache or None
+            On-disk cache of scraped results, only created when `cache_dir` is set in config.
         player_name : str or None
             Name of the player being scraped. You may forcely set this parameter, for some players which may not be searched.
         player_id : int or None
@@ -54,22 +101,35 @@ class HLTV_Player_Stat_Scraper:
         self.matches = []
         self._config = get_scraper_config()
         self.logger = get_logger(__name__, self._config.LOG_FILE)
-        self._driver = self._get_driver()
+        self._http = self._get_http_client() if self._config.use_http else None
+        self._cache = self._get_cache() if self._config.cache_dir is not None else None
         self.player_name = player_name
         self.player_id = player_id
         self._selector_paths = get_selector_paths()
+        self._player_url_prefix = self._config.BASE_URL + '/player/'
+        self._match_link_selector = f"{self._selector_paths.match_table} > tr > td:nth-child(1) > a" # Links to the matches in the first column
+        # Acquired last, so that a failure above cannot leak a browser which is neither pooled nor quit.
+        self._driver_key = (self._config.headless, self._config.page_load_strategy)
+        self._driver = self._acquire_driver()
 
         self.logger.info("HLTV_Player_Stat_Scraper initialized")
 
-    def _get_driver(self):
+    def _acquire_driver(self):
         """
-        Initialize and configure the Chrome WebDriver.
+        Take an idle Chrome WebDriver from the pool, or initialize and configure a new one.
         
         Returns
         -------
         WebDriver
             Configured Chrome WebDriver instance
         """
+        pool = _DRIVER_POOL.get(self._driver_key)
+        if pool:
+            self.logger.info("Driver reused from pool")
+            return pool.pop()
+        # Imported here, so that using this module without creating a driver does not pay for these heavy imports
+        import undetected_chromedriver as uc
+        from selenium.webdriver.chrome.options import Options
         options = Options()
         options.page_load_strategy = self._config.page_load_strategy
         if self._config.headless:
@@ -77,8 +137,108 @@ class HLTV_Player_Stat_Scraper:
         driver = uc.Chrome(options=options)
         self.logger.info("Driver initialized")
         return driver
+
+    def _get_http_client(self):
+        """
+        Initialize the HTTP client used for pages not protected by Cloudflare.
+
+        Returns
+        -------
+        httpx.Client
+            Connection-pooled HTTP/2 client
+        """
+        import httpx # Optional dependency, only needed with `use_http` enabled
+        client = httpx.Client(http2=True, headers=self._HTTP_HEADERS, follow_redirects=True)
+        self.logger.info("HTTP client initialized")
+        return client
+
+    def _get_cache(self):
+        """
+        Open the on-disk cache of scraped results.
+
+        Returns
+        -------
+        diskcache.Cache
+            Cache stored in `cache_dir`
+        """
+        import diskcache # Optional dependency, only needed with `cache_dir` set
+        cache = diskcache.Cache(self._config.cache_dir)
+        self.logger.info(f"Cache opened: {self._config.cache_dir}")
+        return cache
+
+    def _get_html(self, url:str):
+        """
+        Fetch a page with the HTTP client and parse it.
+
+        Parameters
+        ----------
+        url : str
+            The URL of the page.
+
+        Returns
+        -------
+        selectolax.parser.HTMLParser
+            Parsed HTML tree of the page
+        """
+        from selectolax.parser import HTMLParser # Optional dependency, only needed with `use_http` enabled
+        response = self._http.get(url)
+        response.raise_for_status()
+        return HTMLParser(response.text)
+
+    @classmethod
+    def release_driver(cls, driver, driver_key:tuple) -> None:
+        """
+        Clear the cookies of a driver and put it back into the pool for later scrapers.
+        A driver which cannot even clear its cookies (e.g. Chrome crashed) is quit instead.
+
+        Parameters
+        ----------
+        driver : WebDriver
+            The driver to be released.
+        driver_key : tuple
+            The pool key of the driver, in format of `(headless, page_load_strategy)`.
+        """
+        try:
+            driver.delete_all_cookies()
+        except Exception:
+            try:
+                driver.quit()
+            except Exception:
+                pass # Already dead, nothing left to clean up
+            return
+        _DRIVER_POOL.setdefault(driver_key, []).append(driver)
+
+    @classmethod
+    def quit_pooled_drivers(cls) -> None:
+        """
+        Quit every idle driver in the pool. Call this once you are done with scraping.
+        """
+        for pool in _DRIVER_POOL.values():
+            while pool:
+                pool.pop().quit()
+
+    def close(self) -> None:
+        """
+        Release the driver of this scraper back to the pool. The scraper should not be used afterwards.
+        """
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
+        if self._driver is None:
+            return
+        self.release_driver(self._driver, self._driver_key)
+        self._driver = None
+        self.logger.info("Driver released to pool")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
-    @exponential_backoff(logger_getter=lambda self: self.logger, max_retries=5, exponential_wait_time=5.5)
     def search_player(self, player_name:str|None) -> str | None:
         """
         This function will search for a player by name. This function DOES NOT ensure that you can get the exact player you want: 
@@ -96,13 +256,8 @@ class HLTV_Player_Stat_Scraper:
             A Part of the URL of the player's page, in format of `/player/<ID>/<PLAYER_NAME>`.
             e.g. `/player/3741/niko`
         """
-        # HLTV search be like:
-        # https://www.hltv.org/search?query=NiKo
-        # so directly visit it.
         player_name = player_name if self.player_name is None else self.player_name
-        search_page = f"{self._config.BASE_URL}/search?query={player_name}"
-        self._driver.get(search_page) # It seems that this page is not protected by Cloudflare?
-        player_url = self._driver.find_element(By.CSS_SELECTOR, self._selector_paths.search).get_attribute('href')
+        player_url = self._find_player_url(player_name)
         if player_url is None:
             self.logger.error(f"Player {player_name} not found")
             return None
@@ -110,6 +265,31 @@ class HLTV_Player_Stat_Scraper:
         self.parse_player_website(player_url)
         return player_url
 
+    @disk_cache(cache_getter=lambda self: self._cache, key_getter=lambda self, player_name: ("search_player", player_name), logger_getter=lambda self: self.logger)
+    @exponential_backoff(logger_getter=lambda self: self.logger, max_retries=5, exponential_wait_time=5.5, giveup=_is_permanent_error)
+    def _find_player_url(self, player_name:str) -> str | None:
+        """
+        Search for a player on HLTV and return the URL of the first result. Results never expire in the cache.
+        """
+        # HLTV search be like:
+        # https://www.hltv.org/search?query=NiKo
+        # so directly visit it.
+        search_page = f"{self._config.BASE_URL}/search?query={player_name}"
+        # A missing search box means the page did not load (retried), a missing result means there is no such player (None).
+        if self._http is not None:
+            tree = self._get_html(search_page)
+            if tree.css_first(self._selector_paths.search_box) is None:
+                raise ValueError(f"Search box not found in {search_page}")
+            player_node = tree.css_first(self._selector_paths.search)
+            player_href = None if player_node is None else player_node.attributes.get('href')
+            player_url = None if player_href is None else urljoin(self._config.BASE_URL, player_href) # Same absolute URL as Selenium gives
+        else:
+            self._driver.get(search_page) # It seems that this page is not protected by Cloudflare?
+            WebDriverWait(self._driver, self._PAGE_WAIT_TIMEOUT).until(EC.presence_of_element_located((By.CSS_SELECTOR, self._selector_paths.search_box)))
+            player_elements = self._driver.find_elements(By.CSS_SELECTOR, self._selector_paths.search)
+            player_url = player_elements[0].get_attribute('href') if player_elements else None
+        return player_url
+
     def parse_player_website(self, player_url:str) -> None:
         """
         This function will parse the player's website URL and store it into the scraper.
@@ -124,13 +304,15 @@ class HLTV_Player_Stat_Scraper:
         None.
         """
         self.logger.info(f"Parsing player: {player_url}")
-        player_url = player_url.lstrip(self._config.BASE_URL + '/player/')
+        player_url = player_url.removeprefix(self._player_url_prefix) # Not lstrip, which strips a character set rather than a prefix
         player_id, player_name = player_url.split('/')
         self.player_id = player_id
         self.player_name = player_name
         self.logger.info(f"Player ID: {self.player_id}, Player Name: {self.player_name}")
 
-    @exponential_backoff(logger_getter=lambda self: self.logger, max_retries=5, exponential_wait_time=5.5)
+    @disk_cache(cache_getter=lambda self: self._cache, key_getter=lambda self, stats_filter: ("get_basic_stats", self.player_id, str(stats_filter)),
+                expire_getter=lambda self: self._config.cache_ttl, logger_getter=lambda self: self.logger)
+    @exponential_backoff(logger_getter=lambda self: self.logger, max_retries=5, exponential_wait_time=5.5, giveup=_is_permanent_error)
     def get_basic_stats(self, stats_filter:Filter) -> dict[str, str]:
         """
         Retrieve basic statistics for the player based on specified filters.
@@ -160,12 +342,22 @@ class HLTV_Player_Stat_Scraper:
         """
         src_url = f"{self._config.BASE_URL}/stats/players/{self.player_id}/{self.player_name}?{str(stats_filter)}"
         self._driver.get(src_url)
+        WebDriverWait(self._driver, self._PAGE_WAIT_TIMEOUT).until(EC.presence_of_element_located((By.CSS_SELECTOR, self._selector_paths.player_stat_box)))
         self.logger.info(f"Getting basic stats for player: {self.player_name}")
-        stats = {key:self._driver.find_element(By.CSS_SELECTOR, value).text.split("\n")[0] for key, value in self._selector_paths.player_basic_stats.items()}
+        # Query every stat in the browser within one round trip, instead of one find_element per stat.
+        # The stat box is located once, and every stat is then searched inside it.
+        stats = self._driver.execute_script(self._BASIC_STATS_SCRIPT, self._selector_paths.player_stat_box, self._selector_paths.player_basic_stats)
+        if stats is None:
+            raise selenium.common.exceptions.NoSuchElementException("Player stat box not found")
+        if missing := [key for key, value in stats.items() if value is None]:
+            # Keep failing like find_element did, so that the page gets retried (e.g. stuck by Cloudflare).
+            raise selenium.common.exceptions.NoSuchElementException(f"Basic stats not found: {missing}")
         self.logger.info(f"Basic stats of {self.player_name} has been retrieved: {visualize_player_stats(stats)}")
         return stats
 
 
+    @disk_cache(cache_getter=lambda self: self._cache, key_getter=lambda self, match_filter: ("get_match_urls", self.player_id, str(match_filter)),
+                expire_getter=lambda self: self._config.cache_ttl, logger_getter=lambda self: self.logger)
     def get_match_urls(self, match_filter:Filter) -> list[str]:
         """
         Retrieve URLs for all matches played by the player based on specified filters.
@@ -187,25 +379,17 @@ class HLTV_Player_Stat_Scraper:
         offset = 0
         matches = []
         self.logger.info(f"Getting matches of {self.player_name}")
-        @exponential_backoff(logger_getter=lambda scraper_instance: scraper_instance.logger, max_retries=5, exponential_wait_time=5.5)
-        def get_matches_from_url(scraper_instance, offset: int = 0):
-            if offset == 0:
-                src_url = f"{self._config.BASE_URL}/stats/players/matches/{self.player_id}/{self.player_name}?{str(match_filter)}"
-            else:
-                src_url = f"{self._config.BASE_URL}/stats/players/matches/{self.player_id}/{self.player_name}?offset={offset}&{str(match_filter)}"
-            self._driver.get(src_url)
-            self._driver.find_element(By.CSS_SELECTOR, self._selector_paths.match_table)
-            # And by now we ensure that the page is loaded
-            this_page_matches = []
-            for i in range(1, 101): # HLTV match page is ranging from 1 to 100
-                try:
-                    match_url = self._driver.find_element(By.CSS_SELECTOR, f"{self._selector_paths.match_table} > tr:nth-child({i}) > td:nth-child(1) > a").get_attribute('href')
-                    this_page_matches.append(match_url)
-                except selenium.common.exceptions.NoSuchElementException:
-                    break
-            self.logger.info(f"Matches in sub-pages of {self.player_name} with offset = {offset} has been retrieved: {len(this_page_matches)}")
-            return this_page_matches
-        while (result := get_matches_from_url(self, offset)) != []:
+        # The filter query and the base URL stay the same across pages, build them only once.
+        filter_query = str(match_filter)
+        base_url = f"{self._config.BASE_URL}/stats/players/matches/{self.player_id}/{self.player_name}"
+        def get_page_url(offset: int) -> str:
+            return f"{base_url}?{filter_query}" if offset == 0 else f"{base_url}?offset={offset}&{filter_query}"
+        if self._http is not None:
+            matches = asyncio.run(self._gather_match_urls(get_page_url))
+            self.logger.info(f"Total matches of {self.player_name} has been retrieved: {len(matches)}")
+            return matches
+        while (result := self._fetch_match_page(get_page_url(offset))) != []:
+            self.logger.info(f"Matches in sub-pages of {self.player_name} with offset = {offset} has been retrieved: {len(result)}")
             matches.extend(result)
             if len(result) < 100: # If there is less than 100 matches in the page, we know that we have reached the end of the page
                 break
@@ -213,6 +397,94 @@ class HLTV_Player_Stat_Scraper:
         self.logger.info(f"Total matches of {self.player_name} has been retrieved: {len(matches)}")
         return matches
 
+    @exponential_backoff(logger_getter=lambda self: self.logger, max_retries=5, exponential_wait_time=5.5, giveup=_is_permanent_error)
+    def _fetch_match_page(self, page_url:str) -> list[str]:
+        """
+        Load one page of the match history in the browser and collect its match URLs.
+
+        Parameters
+        ----------
+        page_url : str
+            The URL of the match history page.
+
+        Returns
+        -------
+        list[str]
+            List of URLs for individual match pages, at most 100
+        """
+        self._driver.get(page_url)
+        WebDriverWait(self._driver, self._PAGE_WAIT_TIMEOUT).until(EC.presence_of_element_located((By.CSS_SELECTOR, self._selector_paths.match_table)))
+        # And by now we ensure that the page is loaded
+        # Collect the links of all rows of the page (at most 100) in the browser, within one round trip.
+        return self._driver.execute_script(self._MATCH_URLS_SCRIPT, self._match_link_selector)
+
+    @exponential_backoff(logger_getter=lambda self: self.logger, max_retries=5, exponential_wait_time=5.5, giveup=_is_permanent_error)
+    async def _fetch_match_urls(self, client, src_url:str, offset:int) -> list[str]:
+        """
+        Fetch one page of the match history with the async HTTP client and collect its match URLs.
+
+        Parameters
+        ----------
+        client : httpx.AsyncClient
+            The client to send the request with.
+        src_url : str
+            The URL of the match history page.
+        offset : int
+            The offset of the page. A page past offset 0 without a match table is past the end of the history.
+
+        Returns
+        -------
+        list[str]
+            List of URLs for individual match pages, at most 100
+        """
+        from selectolax.parser import HTMLParser # Optional dependency, only needed with `use_http` enabled
+        response = await client.get(src_url)
+        response.raise_for_status()
+        tree = HTMLParser(response.text)
+        if tree.css_first(self._selector_paths.match_table) is None:
+            if offset > 0:
+                return [] # Past the end of the history, not worth retrying
+            raise ValueError(f"Match table not found in {src_url}")
+        nodes = tree.css(self._match_link_selector)
+        return [urljoin(self._config.BASE_URL, node.attributes['href']) for node in nodes] # Same absolute URLs as Selenium gives
+
+    async def _gather_match_urls(self, get_page_url) -> list[str]:
+        """
+        Paginate through the match history with concurrent requests.
+
+        The first page is fetched alone, since most players fit in it. Afterwards, `http_batch_size` pages
+        are requested at once, until a page with less than 100 matches marks the end of the history.
+
+        Parameters
+        ----------
+        get_page_url : Callable[[int], str]
+            Builds the URL of the match history page at a given offset.
+
+        Returns
+        -------
+        list[str]
+            List of URLs for individual match pages
+        """
+        import httpx # Optional dependency, only needed with `use_http` enabled
+        matches = []
+        offset = 0
+        batch_size = 1
+        async with httpx.AsyncClient(http2=True, headers=self._HTTP_HEADERS, follow_redirects=True) as client:
+            while True:
+                offsets = range(offset, offset + 100 * batch_size, 100)
+                # Most pages of a batch may be past the end of the history, so their failures must not fail the whole sweep.
+                pages = await asyncio.gather(*(self._fetch_match_urls(client, get_page_url(page_offset), page_offset) for page_offset in offsets),
+                                             return_exceptions=True)
+                for page_offset, this_page_matches in zip(offsets, pages):
+                    if isinstance(this_page_matches, BaseException):
+                        raise this_page_matches # Only reached before the first short page, when the history is indeed incomplete
+                    self.logger.info(f"Matches in sub-pages of {self.player_name} with offset = {page_offset} has been retrieved: {len(this_page_matches)}")
+                    matches.extend(this_page_matches)
+                    if len(this_page_matches) < 100: # If there is less than 100 matches in the page, we know that we have reached the end of the page
+                        return matches
+                offset += 100 * batch_size
+                batch_size = self._config.http_batch_size
+
 def main():
     """
     Main function demonstrating usage of the HLTV_Player_Stat_Scraper class.
@@ -228,27 +500,30 @@ def main():
     -------
     >>> # Results can be used with match.py to get detailed match information
     """
-    # search certain player
-    scraper = HLTV_Player_Stat_Scraper()
-    player_name = 'NiKo'
-    player_url = scraper.search_player(player_name)
-    # parse player's website -> matches
-    if player_url is None:
-        print("Player not found")
-        return
-    scraper.parse_player_website(player_url) # This has been merged into search_player procedure, but you can do it manually.
-    stat = scraper.get_basic_stats(
-        stats_filter = Filter(
-            quick_time_filter='Last Month',
-            ranking='Top5'
-        )
-    )
-    matches = scraper.get_match_urls(
-        match_filter = Filter(
-            ranking='Top5'
-        )
-    )
-    # These matches could be further passed to `match.py` to get more details.
+    try:
+        # search certain player
+        with HLTV_Player_Stat_Scraper() as scraper: # The driver goes back to the pool on exit, and will be reused by the next scraper.
+            player_name = 'NiKo'
+            player_url = scraper.search_player(player_name)
+            # parse player's website -> matches
+            if player_url is None:
+                print("Player not found")
+                return
+            scraper.parse_player_website(player_url) # This has been merged into search_player procedure, but you can do it manually.
+            stat = scraper.get_basic_stats(
+                stats_filter = Filter(
+                    quick_time_filter='Last Month',
+                    ranking='Top5'
+                )
+            )
+            matches = scraper.get_match_urls(
+                match_filter = Filter(
+                    ranking='Top5'
+                )
+            )
+            # These matches could be further passed to `match.py` to get more details.
+    finally:
+        HLTV_Player_Stat_Scraper.quit_pooled_drivers()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,30 @@
+import functools
+
+_MISSING = object()
+
+def disk_cache(cache_getter, key_getter, expire_getter=None, logger_getter=None):
+    """
+    Memoize a method on disk. `None` results are never stored, so that failed scrapes are retried next time.
+
+    cache_getter(self) returns a `diskcache.Cache`, or None to disable caching.
+    key_getter(self, *args, **kwargs) returns the cache key, which should only depend on what the result depends on.
+    expire_getter(self) returns the TTL in seconds, None (or no getter) for never expiring.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = cache_getter(args[0])
+            if cache is None:
+                return func(*args, **kwargs)
+            key = key_getter(*args, **kwargs)
+            result = cache.get(key, default=_MISSING)
+            if result is not _MISSING:
+                if logger_getter is not None:
+                    logger_getter(args[0]).info(f"Cache hit: {key}")
+                return result
+            result = func(*args, **kwargs)
+            if result is not None:
+                cache.set(key, result, expire=expire_getter(args[0]) if expire_getter else None)
+            return result
+        return wrapper
+    return decorator
@@ -1,27 +1,171 @@
+import asyncio
 import functools
+import inspect
+import random
+import threading
 import time
+from typing import Callable, Literal
 
-def exponential_backoff(logger_getter=None, max_retries=5, exponential_wait_time=5.5):
+JITTER_MODES = ("none", "full", "equal", "decorrelated")
+
+def _backoff_delay(jitter, delay, exponential_wait_time, cap, previous_delay):
+    # See "Exponential Backoff And Jitter" on the AWS Architecture Blog for the jitter modes.
+    # delay is the capped exponential delay of this retry, taken from the precomputed schedule.
+    match jitter:
+        case "none":
+            return delay
+        case "full":
+            return random.uniform(0, delay)
+        case "equal":
+            return delay / 2 + random.uniform(0, delay / 2)
+        case "decorrelated":
+            return min(cap, random.uniform(exponential_wait_time, previous_delay * 3))
+
+_TURNSTILE_HELP = (
+    "We might have been stuck by Cloudflare Turnstile!\n"
+    "If this continuously happens, consider manual intervention with 'headless = false'. (Click that button!)\n"
+    "It has been tested that proxy and VPN might trigger this.\n"
+    "Consider turn it off."
+)
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised without calling the decorated function, while it is cooling down after repeatedly reaching max retries.
+    """
+
+class _CircuitBreaker:
+    # Counts the calls of one decorated function that reached max retries in a row, across all callers.
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def check(self, func):
+        if self.blocked_until and (remaining := self.blocked_until - time.monotonic()) > 0:
+            raise CircuitOpenError(f"{func.__name__} kept failing, not retrying it for another {remaining:.0f} seconds")
+
+    def record_success(self):
+        if self.consecutive_failures:
+            with self._lock:
+                self.consecutive_failures = 0
+                self.blocked_until = 0.0
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.threshold:
+                self.blocked_until = time.monotonic() + self.cooldown
+
+class _Call:
+    # What one call of a decorated function keeps between its tries.
+    __slots__ = ("args", "logger", "delay", "deadline")
+
+    def __init__(self, args, delay, deadline):
+        self.args = args
+        self.logger = None
+        self.delay = delay # The previous delay, for "decorrelated" jitter
+        self.deadline = deadline
+
+def _log_retry(logger, func, e, retry_count, max_retries, delay):
+    if logger is not None:
+        logger.warning("An error occurred: %s", e)
+        logger.warning("Retrying %s (%d/%d) [Delayed Time = %.2f seconds]...", func.__name__, retry_count, max_retries, delay)
+
+def _log_give_up(logger, func):
+    if logger is not None:
+        logger.error("Max retries reached. Failed to execute %s", func.__name__)
+        logger.error(_TURNSTILE_HELP)
+
+def exponential_backoff(logger_getter=None, max_retries=5, exponential_wait_time=5.5,
+                        jitter:Literal["none", "full", "equal", "decorrelated"]="full", cap=float("inf"),
+                        retry_on:tuple[type[BaseException], ...]=(Exception,), giveup:Callable[[BaseException], bool] | None=None,
+                        breaker_threshold:int | None=3, breaker_cooldown:float=300, max_total_wait:float | None=None):
+    """
+    Retry the decorated function with exponential backoff, re-raising the last exception once `max_retries` is reached.
+
+    Only exceptions in retry_on are retried, anything else is raised at once. So is an exception for which
+    giveup(exception) is true, e.g. an error that retrying cannot fix.
+
+    jitter randomizes the delays, so that scrapers blocked at the same time do not retry in lockstep:
+    - "none": exponential_wait_time * 2 ** retry_count
+    - "full": uniform between 0 and the "none" delay
+    - "equal": half of the "none" delay, plus uniform up to the other half
+    - "decorrelated": uniform between exponential_wait_time and 3 times the previous delay
+    No delay is longer than cap seconds.
+
+    max_total_wait bounds the time a call spends, tries included, from its start: no sleep goes past that deadline, and
+    the call gives up once it is reached. None (default) keeps the whole schedule.
+
+    Once breaker_threshold calls in a row have reached max retries (e.g. Cloudflare is blocking us), further calls
+    fail at once with CircuitOpenError for breaker_cooldown seconds, instead of going through the whole schedule again.
+    A successful call resets the count. Pass breaker_threshold=None to disable this.
+
+    Coroutine functions are supported as well: they get an async wrapper that awaits `asyncio.sleep` instead of
+    blocking the thread, so they must be awaited like the original. Calling them from sync code is not supported.
+    """
+    if jitter not in JITTER_MODES:
+        raise ValueError(f"jitter should be one of {JITTER_MODES}, got {jitter}")
+    # The exponential schedule only depends on the arguments, so it is computed once here.
+    delays = tuple(min(cap, exponential_wait_time * (1 << retry_count)) for retry_count in range(max_retries))
+    if max_total_wait is None:
+        max_total_wait = float("inf")
     def decorator(func):
+        breaker = _CircuitBreaker(breaker_threshold, breaker_cooldown) if breaker_threshold is not None else None
+
+        def start(args):
+            if breaker is not None:
+                breaker.check(func)
+            return _Call(args, exponential_wait_time, time.monotonic() + max_total_wait)
+
+        def succeeded():
+            if breaker is not None:
+                breaker.record_success()
+
+        def retry_delay(call, e, retry_count, base_delay):
+            """
+            Handle the exception e of try number retry_count: return how long to sleep before the next try,
+            or re-raise e (which the calling wrapper is handling) to give up.
+            """
+            if giveup is not None and giveup(e):
+                raise
+            if call.logger is None and logger_getter is not None:
+                call.logger = logger_getter(call.args[0]) # Only resolved once something fails, the first try usually succeeds
+            remaining = call.deadline - time.monotonic()
+            if retry_count + 1 == max_retries or remaining <= 0:
+                _log_give_up(call.logger, func)
+                if breaker is not None:
+                    breaker.record_failure()
+                raise
+            call.delay = min(_backoff_delay(jitter, base_delay, exponential_wait_time, cap, call.delay), remaining)
+            _log_retry(call.logger, func, e, retry_count, max_retries, call.delay)
+            return call.delay
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                call = start(args)
+                for retry_count, base_delay in enumerate(delays):
+                    try:
+                        result = await func(*args, **kwargs)
+                    except retry_on as e:
+                        # Other coroutines keep running (and backing off) meanwhile
+                        await asyncio.sleep(retry_delay(call, e, retry_count, base_delay))
+                    else:
+                        succeeded()
+                        return result
+            return async_wrapper
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            logger = logger_getter(args[0]) if logger_getter else None
-            retry_count = 0
-            while retry_count < max_retries:
+            call = start(args)
+            for retry_count, base_delay in enumerate(delays):
                 try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    if logger is not None:
-                        logger.warning(f"An error occurred: {e}")
-                        logger.warning(f"Retrying {func.__name__} ({retry_count}/{max_retries}) [Delayed Time = {exponential_wait_time * (2 ** retry_count)} seconds]...")
-                    time.sleep(exponential_wait_time * (2 ** retry_count))
-                    retry_count += 1
-            if logger is not None:
-                logger.error(f"Max retries reached. Failed to execute {func.__name__}")
-                logger.error("We might have been stuck by Cloudflare Turnstile!")
-                logger.error("If this continuously happens, consider manual intervention with 'headless = false'. (Click that button!)")
-                logger.error("It has been tested that proxy and VPN might trigger this.")
-                logger.error("Consider turn it off.")
-            return None
+                    result = func(*args, **kwargs)
+                except retry_on as e:
+                    time.sleep(retry_delay(call, e, retry_count, base_delay))
+                else:
+                    succeeded()
+                    return result
         return wrapper
     return decorator